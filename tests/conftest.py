@@ -0,0 +1,11 @@
+import pytest
+
+
+def _dense(I):
+    return tuple(_dense(x) for x in I) if isinstance(I, tuple) else I.toarray()
+
+
+@pytest.fixture
+def dense():
+    """Convert an incidence matrix, or a tuple of them, to dense arrays."""
+    return _dense
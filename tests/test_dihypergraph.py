@@ -0,0 +1,364 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from xgi.exception import XGIError
+
+from xgi_ubergraphs import DiUberGraphs, IDDict, update_uid_counter
+
+
+def test_attributes_are_allocated_lazily():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]))
+    H.add_edge(([3], [4]), w=2)
+    H.add_node(5, color="red")
+    assert dict(H._node_attr) == {5: {"color": "red"}}
+    assert dict(H._edge_attr) == {1: {"w": 2}}
+    assert H.nodes[1] == {}
+    assert H.edges[0] == {}
+    assert H.nodes.attrs("color").asdict() == {
+        1: None,
+        2: None,
+        3: None,
+        4: None,
+        5: "red",
+    }
+
+
+def test_set_attributes_through_views():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]))
+    H.add_edge(([3], [4]))
+    H.edges[0]["w"] = 2
+    H.nodes[1]["color"] = "blue"
+    assert H.edges[0] == {"w": 2}
+    assert H.edges[1] == {}
+    assert H.nodes[1] == {"color": "blue"}
+    assert H.nodes[2] == {}
+    # each node and edge gets its own dict
+    assert H.nodes[3] is not H.nodes[4]
+
+
+def test_attributes_of_missing_ids():
+    H = DiUberGraphs()
+    H.add_edge(([1], [2]))
+    with pytest.raises(KeyError):
+        H._node_attr[3]
+    assert 3 not in H._node_attr
+
+
+def test_add_node_updates_attributes():
+    H = DiUberGraphs()
+    H.add_node(1)
+    H.add_node(1, color="red")
+    H.add_node(1, size=2)
+    assert H.nodes[1] == {"color": "red", "size": 2}
+
+
+def test_attributes_pickle():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]), w=2)
+    H2 = pickle.loads(pickle.dumps(H))
+    assert H2.edges[0] == {"w": 2}
+    H2.nodes[1]["color"] = "red"
+    assert H2.nodes[1] == {"color": "red"}
+    assert H2._node_attr._ids is H2._node
+
+
+def _from_arrays(edges, **kwargs):
+    tail_offsets = np.cumsum([0] + [len(tail) for tail, _ in edges])
+    head_offsets = np.cumsum([0] + [len(head) for _, head in edges])
+    tail_nodes = [node for tail, _ in edges for node in tail]
+    head_nodes = [node for _, head in edges for node in head]
+    H = DiUberGraphs()
+    H.add_edges_from_arrays(
+        tail_offsets, tail_nodes, head_offsets, head_nodes, **kwargs
+    )
+    return H
+
+
+_EDGES = [([1, 2, 3], [4]), ([4], [5, 6]), ([], [1]), ([2, 2], [2]), ([6], [])]
+
+
+def test_add_edges_from_arrays_matches_add_edge():
+    H = DiUberGraphs()
+    for edge in _EDGES:
+        H.add_edge(edge)
+    H2 = _from_arrays(_EDGES)
+    assert H2._edge == H._edge
+    assert H2._node == H._node
+    assert H2._edge_uid == H._edge_uid
+    H2.add_edge(([1], [2]))
+    assert 5 in H2._edge
+
+
+def test_add_edges_from_arrays_uids():
+    H = DiUberGraphs()
+    for uid, edge in zip([10, "a", 3, 7, 1], _EDGES):
+        H.add_edge(edge, idx=uid)
+    H2 = _from_arrays(_EDGES, uids=[10, "a", 3, 7, 1])
+    assert H2._edge == H._edge
+    assert H2._node == H._node
+    assert H2._edge_uid == H._edge_uid == 11
+
+
+def test_add_edges_from_arrays_empty():
+    H = _from_arrays([])
+    assert not H._edge
+    assert not H._node
+    assert H._edge_uid == 0
+
+
+@pytest.mark.parametrize("uids", [[0, 0, 1, 2, 3], [0, 1, 2, 3], [0, 1, 2, 3, 4, 5]])
+def test_add_edges_from_arrays_bad_uids(uids):
+    with pytest.raises(ValueError):
+        _from_arrays(_EDGES, uids=uids)
+
+
+def test_add_edges_from_arrays_uid_in_use():
+    H = DiUberGraphs()
+    H.add_edge(([1], [2]), idx=5)
+    with pytest.raises(ValueError):
+        H.add_edges_from_arrays([0, 1], [3], [0, 1], [4], uids=[5])
+    assert list(H._edge) == [5]
+    assert list(H._node) == [1, 2]
+
+
+@pytest.mark.parametrize("uids", [[7, None], [7, [1]], [7, 5], [7, 7]])
+def test_add_edges_from_arrays_bad_uid_keeps_counter(uids):
+    H = DiUberGraphs()
+    H.add_edge(([1], [2]), idx=5)
+    with pytest.raises(ValueError):
+        H.add_edges_from_arrays([0, 1, 2], [3, 4], [0, 1, 2], [5, 6], uids=uids)
+    assert list(H._edge) == [5]
+    assert H._edge_uid == 6
+
+
+def test_add_edges_from_arrays_uid_counter():
+    H = DiUberGraphs()
+    H.add_edges_from_arrays(
+        [0, 1, 2, 3], [1, 2, 3], [0, 1, 2, 3], [4, 5, 6], uids=[9, "a", 3.0]
+    )
+    assert H._edge_uid == 10
+    H.add_edge(([1], [2]))
+    assert 10 in H._edge
+
+
+@pytest.mark.parametrize(
+    "tail_offsets, head_offsets",
+    [
+        ([0, 1], [0, 1, 1]),  # lengths differ
+        ([1, 2], [0, 1]),  # does not start at 0
+        ([0, 1], [0, 2]),  # does not end at the number of nodes
+        ([0, 2, 1], [0, 0, 1]),  # decreasing
+        ([], []),  # no offsets at all
+    ],
+)
+def test_add_edges_from_arrays_bad_offsets(tail_offsets, head_offsets):
+    H = DiUberGraphs()
+    with pytest.raises(ValueError):
+        H.add_edges_from_arrays(tail_offsets, [1], head_offsets, [2])
+    assert not H._edge
+    assert H._edge_uid == 0
+
+
+@pytest.mark.parametrize(
+    "tail_offsets, tail_nodes, head_offsets, head_nodes",
+    [
+        ([0, 1], [1.7], [0, 1], [2]),
+        ([0, 1], [1], [0, 1], [2.9]),
+        ([0, 1.0], [1], [0, 1], [2]),
+        ([0, 1], ["1"], [0, 1], [2]),
+        ([0, 1], [True], [0, 1], [2]),
+    ],
+)
+def test_add_edges_from_arrays_non_integers(
+    tail_offsets, tail_nodes, head_offsets, head_nodes
+):
+    H = DiUberGraphs()
+    with pytest.raises(ValueError):
+        H.add_edges_from_arrays(tail_offsets, tail_nodes, head_offsets, head_nodes)
+    assert not H._edge
+    assert not H._node
+
+
+def test_add_edges_from_arrays_dtypes():
+    H = DiUberGraphs()
+    H.add_edges_from_arrays(
+        np.array([0, 2], dtype=np.uint8),
+        np.array([1, 2], dtype=np.int32),
+        [0, 0],
+        np.array([], dtype=np.float64),
+    )
+    assert H._edge == {0: {"in": {1, 2}, "out": set()}}
+
+
+def test_iddict_validate():
+    d = IDDict()
+    d.validate(1)
+    d.validate(("a", 2))
+    with pytest.raises(XGIError):
+        d.validate(None)
+    with pytest.raises(TypeError):
+        d.validate([1])
+
+
+def test_none_is_not_a_node():
+    H = DiUberGraphs()
+    with pytest.raises(XGIError):
+        H.add_node(None)
+    H.add_edge(([1], [2]))
+    with pytest.raises(XGIError):
+        H.add_edge(([3, None], [4]))
+    with pytest.raises(XGIError):
+        H.add_edge(([3], [([None], [5])]))
+    # a failed add_edge leaves the dihypergraph unchanged
+    assert list(H._node) == [1, 2]
+    assert list(H._edge) == [0]
+    assert H._edge_uid == 1
+
+
+def test_strict_ids():
+    code = (
+        "from xgi.exception import IDNotFound, XGIError\n"
+        "from xgi_ubergraphs import IDDict\n"
+        "d = IDDict()\n"
+        "try:\n"
+        "    d[None] = 1\n"
+        "except XGIError:\n"
+        "    pass\n"
+        "else:\n"
+        "    raise AssertionError\n"
+        "try:\n"
+        "    d[1]\n"
+        "except IDNotFound:\n"
+        "    pass\n"
+        "else:\n"
+        "    raise AssertionError\n"
+    )
+    # strict mode is read when xgi_ubergraphs is imported, so use a new process
+    env = dict(os.environ, XGI_UBERGRAPHS_STRICT_IDS="1")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=root, check=True)
+
+
+def test_nested_edges_uid_order():
+    H = DiUberGraphs()
+    H.add_edge(([1, ([2, ([7], [8])], [3])], [([4], [5]), 6]), w=1)
+    # depth-first, in the order the nested edges appear
+    assert H._edge == {
+        0: {"in": {1}, "out": {6}},
+        1: {"in": {2}, "out": {3}},
+        2: {"in": {7}, "out": {8}},
+        3: {"in": {4}, "out": {5}},
+    }
+    assert H._edge_uid == 4
+    # only the outer edge gets the attributes
+    assert H.edges[0] == {"w": 1}
+    assert H.edges[1] == {}
+
+
+def test_nested_edges_with_idx():
+    H = DiUberGraphs()
+    H.add_edge(([1, ([2], [3])], [4]), idx=10)
+    assert list(H._edge) == [10, 11]
+    assert H._edge == {10: {"in": {1}, "out": {4}}, 11: {"in": {2}, "out": {3}}}
+    assert H._edge_uid == 12
+
+
+def test_groups_of_nodes_are_flattened():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2, [3, 4]], [range(5, 7), 7]))
+    assert H._edge == {0: {"in": {1, 2, 3, 4}, "out": {5, 6, 7}}}
+
+
+def test_nested_edge_uid_in_use():
+    H = DiUberGraphs()
+    H.add_edge(([1], [2]), idx=1)
+    H._edge_uid = 0
+    with pytest.warns(UserWarning):
+        H.add_edge(([3, ([4], [5])], [6]))
+    assert H._edge == {1: {"in": {1}, "out": {2}}, 0: {"in": {3}, "out": {6}}}
+
+
+def test_uid_counter():
+    H = DiUberGraphs()
+    H.add_edge(([1], [2]))
+    H.add_edge(([2], [3]), idx=5)
+    H.add_edge(([3], [4]), idx="a")
+    H.add_edge(([4], [5]), idx=np.int32(7))
+    H.add_edge(([4], [5]), idx=2)
+    H.add_edge(([5], [6]))
+    assert list(H._edge) == [0, 5, "a", 7, 2, 8]
+    assert type(H._edge_uid) is int
+    assert H._edge_uid == 9
+
+
+@pytest.mark.parametrize(
+    "idx, expected",
+    [(3, 4), (3.0, 4), (np.int64(9), 10), (1, 2), (2.5, 2), ("5", 2), ((5, 6), 2)],
+)
+def test_update_uid_counter(idx, expected):
+    H = DiUberGraphs()
+    H._edge_uid = 2
+    update_uid_counter(H, idx)
+    assert H._edge_uid == expected
+    assert type(H._edge_uid) is int
+
+
+def test_stat_wrappers():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]))
+    assert H.degree() == {1: 1, 2: 1, 3: 1}
+    assert H.degree(1) == 1
+    assert H.in_degree() == {1: 0, 2: 0, 3: 1}
+    # edge stats are found too
+    assert H.order() == {0: 2}
+
+
+def test_stat_wrappers_are_cached():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]))
+    degree = H.degree
+    assert H.__dict__["degree"] is degree
+    assert H.degree is degree
+    # the cached wrapper still computes the stat on every call
+    H.add_edge(([1], [4]))
+    assert H.degree() == {1: 2, 2: 1, 3: 1, 4: 1}
+
+
+def test_stat_wrappers_missing():
+    H = DiUberGraphs()
+    with pytest.raises(AttributeError):
+        H.not_a_stat
+    assert "not_a_stat" not in H.__dict__
+    # private names are never looked up as stats
+    with pytest.raises(AttributeError):
+        H._degree
+    H2 = DiUberGraphs.__new__(DiUberGraphs)
+    with pytest.raises(AttributeError):
+        H2._nodeview
+
+
+def test_stat_wrappers_pickle():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]))
+    assert H.degree() == {1: 1, 2: 1, 3: 1}
+    H2 = pickle.loads(pickle.dumps(H))
+    # the cached wrapper of H is dropped, rather than refer to the views of H
+    assert "degree" not in H2.__dict__
+    H2.add_edge(([1], [4]))
+    assert H2.degree() == {1: 2, 2: 1, 3: 1, 4: 1}
+    assert H.degree() == {1: 1, 2: 1, 3: 1}
+
+
+def test_setstate_drops_cached_wrappers():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2], [3]))
+    H.degree()
+    H.__setstate__(DiUberGraphs().__getstate__())
+    assert "degree" not in H.__dict__
+    assert H.degree() == {}
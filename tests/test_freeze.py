@@ -0,0 +1,133 @@
+import pickle
+
+import numpy as np
+import pytest
+from xgi.exception import IDNotFound
+
+from xgi_ubergraphs import DiUberGraphs, incidence_matrix
+
+
+@pytest.fixture
+def H():
+    H = DiUberGraphs()
+    H.add_edge((list(range(100)), [200, 201]))
+    H.add_edge(([1, 2, 3], [4]), w=2)
+    H.add_edge(([1, "a", 2.5], ["b", 6]))
+    H.add_edge(([], [7]))
+    H.add_edge((list(range(100)) + ["a"], [1]))
+    H.add_node(8, color="red")
+    return H
+
+
+# Large enough that freeze never uses bitmaps, and the default
+@pytest.fixture(params=[10**9, 64], ids=["tuples", "bitmaps"])
+def bitmap_threshold(request):
+    return request.param
+
+
+def _snapshot(H):
+    return {
+        "nodes": list(H.nodes),
+        "edges": list(H.edges),
+        "members": H.edges.members(dtype=dict),
+        "tail": H.edges.tail(dtype=dict),
+        "head": H.edges.head(dtype=dict),
+        "order": H.edges.order.asdict(),
+        "size": H.edges.size.asdict(),
+        "tail_size": H.edges.tail_size.asdict(),
+        "head_size": H.edges.head_size.asdict(),
+        "degree": H.nodes.degree.asdict(),
+        "in_degree": H.nodes.in_degree.asdict(),
+        "out_degree": H.nodes.out_degree.asdict(),
+        "memberships": {n: H.nodes.memberships(n) for n in H.nodes},
+        "edge_attrs": {e: H.edges[e] for e in H.edges},
+        "node_attrs": {n: H.nodes[n] for n in H.nodes},
+    }
+
+
+def test_freeze_keeps_views_and_stats(H, bitmap_threshold):
+    before = _snapshot(H)
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    assert _snapshot(H) == before
+
+
+def test_freeze_views_return_sets(H, bitmap_threshold):
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    for e in H.edges:
+        assert type(H.edges.members(e)) is set
+        assert type(H.edges.tail(e)) is set
+        assert type(H.edges.head(e)) is set
+    assert all(type(m) is set for m in H.edges.tail())
+    assert H.edges.members(0) == set(range(100)) | {200, 201}
+
+
+def test_freeze_unsortable_nodes(H, bitmap_threshold):
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    # int and str nodes cannot be sorted together
+    assert H.edges.tail(2) == {1, "a", 2.5}
+    assert H.edges.head(2) == {"b", 6}
+    assert H.nodes.memberships("a") == {2, 4}
+
+
+@pytest.mark.parametrize("signed", [False, True])
+@pytest.mark.parametrize("weight", [lambda n, e, H: 1, lambda n, e, H: 3])
+def test_freeze_incidence_matrix(H, bitmap_threshold, signed, weight, dense):
+    before = dense(incidence_matrix(H, signed=signed, weight=weight))
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    after = dense(incidence_matrix(H, signed=signed, weight=weight))
+    np.testing.assert_array_equal(before, after)
+
+
+def test_freeze_pickle(H, bitmap_threshold):
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    H2 = pickle.loads(pickle.dumps(H))
+    assert _snapshot(H2) == _snapshot(H)
+    assert H2._edge == H._edge
+
+
+def test_add_edge_after_freeze(H, bitmap_threshold):
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    H.add_edge(([1], [9]))
+    assert H.nodes.memberships(1) == {0, 1, 2, 4, 5}
+    assert H.edges.members(5) == {1, 9}
+    H.freeze(bitmap_threshold=bitmap_threshold)
+    assert H.edges.members(5) == {1, 9}
+
+
+def test_freeze_stores_large_integer_edges_as_bitmaps(H):
+    pyroaring = pytest.importorskip("pyroaring")
+    H.freeze(bitmap_threshold=64)
+    assert isinstance(H._edge[0]["in"], pyroaring.FrozenBitMap)
+    assert isinstance(H._edge[0]["out"], pyroaring.FrozenBitMap)
+    # small edges, and edges with non-integer nodes, are not
+    assert not isinstance(H._edge[1]["in"], pyroaring.FrozenBitMap)
+    assert not isinstance(H._edge[4]["in"], pyroaring.FrozenBitMap)
+
+
+def test_freeze_bitmap_threshold(H):
+    pyroaring = pytest.importorskip("pyroaring")
+    H.freeze(bitmap_threshold=100)
+    assert not isinstance(H._edge[0]["in"], pyroaring.FrozenBitMap)
+
+
+def test_incidence_bitmap(H):
+    pyroaring = pytest.importorskip("pyroaring")
+    assert H.incidence_bitmap(1, "in") == pyroaring.BitMap([1, 2, 3])
+    H.freeze()
+    bitmap = H.incidence_bitmap(0, "out")
+    assert type(bitmap) is pyroaring.FrozenBitMap
+    assert bitmap == H._edge[0]["out"]
+    assert type(bitmap.copy()) is pyroaring.FrozenBitMap
+    assert len(bitmap & H.incidence_bitmap(4, "out")) == 0
+    assert H.incidence_bitmap(0, "in") == pyroaring.BitMap(range(100))
+    assert H.incidence_bitmap(1, "out") == pyroaring.BitMap([4])
+
+
+def test_incidence_bitmap_errors(H):
+    pytest.importorskip("pyroaring")
+    with pytest.raises(IDNotFound):
+        H.incidence_bitmap(9, "in")
+    with pytest.raises(ValueError):
+        H.incidence_bitmap(0, "x")
+    with pytest.raises(ValueError):
+        H.incidence_bitmap(4, "in")
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+import xgi
+from xgi.exception import XGIError
+
+from xgi_ubergraphs import DiUberGraphs, incidence_matrix
+from xgi_ubergraphs.linalg import incidence_matrix as linalg_incidence_matrix
+
+
+def _dihypergraph():
+    H = DiUberGraphs()
+    H.add_edge(([1, 2, 3], [4]))
+    H.add_edge(([4], [5, 6]))
+    H.add_edge(([1], [2]))
+    return H
+
+
+# Rows are the nodes 1 to 6, columns the edges 0 to 2
+_TAILS = np.array([[1, 0, 1], [1, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 0], [0, 0, 0]])
+_HEADS = np.array([[0, 0, 0], [0, 0, 1], [0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 1, 0]])
+
+
+def test_unsigned():
+    H = _dihypergraph()
+    I = incidence_matrix(H)
+    np.testing.assert_array_equal(I.toarray(), _TAILS | _HEADS)
+    np.testing.assert_array_equal(incidence_matrix(H, sparse=False), I.toarray())
+
+
+@pytest.mark.parametrize("sparse", [True, False])
+def test_signed(sparse):
+    H = _dihypergraph()
+    I_in, I_out = incidence_matrix(H, signed=True, sparse=sparse)
+    if sparse:
+        I_in, I_out = I_in.toarray(), I_out.toarray()
+    np.testing.assert_array_equal(I_in, _TAILS)
+    np.testing.assert_array_equal(I_out, _HEADS)
+
+
+def test_signed_weighted():
+    H = _dihypergraph()
+    # a weight skips the shortcut for unweighted matrices
+    I_in, I_out = incidence_matrix(H, signed=True, weight=lambda n, e, H: 2)
+    np.testing.assert_array_equal(I_in.toarray(), 2 * _TAILS)
+    np.testing.assert_array_equal(I_out.toarray(), 2 * _HEADS)
+
+
+def test_signed_index():
+    H = _dihypergraph()
+    (I_in, I_out), rowdict, coldict = incidence_matrix(H, signed=True, index=True)
+    assert rowdict == {0: 1, 1: 2, 2: 3, 3: 4, 4: 5, 5: 6}
+    assert coldict == {0: 0, 1: 1, 2: 2}
+
+
+def test_signed_empty():
+    I_in, I_out = incidence_matrix(DiUberGraphs(), signed=True)
+    assert I_in.shape == I_out.shape == (0, 0)
+
+
+def test_signed_requires_directed():
+    with pytest.raises(XGIError):
+        incidence_matrix(xgi.Hypergraph([[1, 2], [2, 3]]), signed=True)
+
+
+def test_cache_returns_copies():
+    H = _dihypergraph()
+    I = incidence_matrix(H)
+    I.data[:] = 7
+    np.testing.assert_array_equal(incidence_matrix(H).data, 1)
+
+    I_in, I_out = incidence_matrix(H, signed=True)
+    I_in.data[:] = 7
+    np.testing.assert_array_equal(incidence_matrix(H, signed=True)[0].data, 1)
+
+    I, rowdict, coldict = incidence_matrix(H, index=True)
+    rowdict.clear()
+    assert len(incidence_matrix(H, index=True)[1]) == 6
+
+
+def test_cache_cleared_on_add():
+    H = _dihypergraph()
+    assert incidence_matrix(H).shape == (6, 3)
+    H.add_edge(([7], [1]))
+    assert incidence_matrix(H).shape == (7, 4)
+    H.add_node(8)
+    assert incidence_matrix(H).shape == (8, 4)
+
+
+def test_custom_weights_are_not_cached():
+    H = _dihypergraph()
+    H.add_node(1, w=2)
+
+    def weight(node, edge, H):
+        return H.nodes[node].get("w", 1)
+
+    assert incidence_matrix(H, weight=weight).toarray()[0, 0] == 2
+    H.nodes[1]["w"] = 5
+    assert incidence_matrix(H, weight=weight).toarray()[0, 0] == 5
+    assert not H._incidence_cache
+
+
+@pytest.mark.parametrize("signed", [False, True])
+@pytest.mark.parametrize(
+    "weight",
+    [lambda n, e, H: n * 10 + e, lambda n, e, H: n * 0.75, lambda n, e, H: -n],
+)
+def test_jit_matches_python(monkeypatch, signed, weight, dense):
+    pytest.importorskip("numba")
+    H = _dihypergraph()
+    expected = dense(incidence_matrix(H, weight=weight, signed=signed))
+    # compile the weight whatever the number of incidences
+    monkeypatch.setattr(linalg_incidence_matrix, "_JIT_MIN_NNZ", 0)
+    actual = dense(incidence_matrix(H, weight=weight, signed=signed))
+    assert linalg_incidence_matrix._JIT_WEIGHTS[weight.__code__] is not None
+    np.testing.assert_array_equal(expected, actual)
+
+
+@pytest.mark.parametrize("dtype", [np.float16, object])
+def test_jit_unsupported_dtype(monkeypatch, dtype):
+    pytest.importorskip("numba")
+    H = _dihypergraph()
+    weight = lambda n, e, H: n * 2
+    expected = incidence_matrix(H, weight=weight, dtype=dtype, sparse=False)
+    monkeypatch.setattr(linalg_incidence_matrix, "_JIT_MIN_NNZ", 0)
+    actual = incidence_matrix(H, weight=weight, dtype=dtype, sparse=False)
+    assert actual.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(expected, actual)
+
+
+def test_jit_skips_weights_using_globals(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setattr(linalg_incidence_matrix, "_JIT_MIN_NNZ", 0)
+    H = _dihypergraph()
+    weight = lambda n, e, H: np.int64(n)
+    I = incidence_matrix(H, weight=weight)
+    np.testing.assert_array_equal(I.toarray()[:, 0], [1, 2, 3, 4, 0, 0])
+    assert weight.__code__ not in linalg_incidence_matrix._JIT_WEIGHTS
+
+
+def test_jit_skips_non_integer_ids(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setattr(linalg_incidence_matrix, "_JIT_MIN_NNZ", 0)
+    H = DiUberGraphs()
+    H.add_edge((["a", "b"], ["c"]))
+    weight = lambda n, e, H: 2
+    I = incidence_matrix(H, weight=weight)
+    np.testing.assert_array_equal(I.toarray(), [[2], [2], [2]])
+    assert weight.__code__ not in linalg_incidence_matrix._JIT_WEIGHTS
@@ -1,8 +1,122 @@
-from xgi.utils import IDDict, update_uid_counter
+from .utils import IDDict, _AttrDict, _is_integer_id, update_uid_counter
 from typing import Iterable
-from itertools import count
+from itertools import chain
 import warnings
+
+import numpy as np
 from xgi.core.views import DiEdgeView, DiNodeView
+from xgi.exception import IDNotFound, XGIError
+
+try:
+    from pyroaring import BitMap, FrozenBitMap
+except ImportError:  # pyroaring is optional, see DiUberGraphs.freeze
+    BitMap = FrozenBitMap = None
+
+# Containers treated as groups of nodes, and common node types.  Looking up
+# type(el) in these is much faster than an isinstance check against the Iterable
+# ABC, which is only the fallback for other types.
+_CONTAINER_TYPES = frozenset({list, tuple, set, frozenset})
+_NODE_TYPES = frozenset({int, float, str, bytes})
+
+
+def _is_container(el):
+    """Return True if el is a group of nodes rather than a single node."""
+    t = type(el)
+    if t in _CONTAINER_TYPES:
+        return True
+    if t in _NODE_TYPES:
+        return False
+    return isinstance(el, Iterable) and not isinstance(el, (str, bytes))
+
+
+def _is_edge_like(el):
+    """Return True if el looks like a nested edge: (tail, head) with length 2
+    and at least one side is a group of nodes."""
+    if not isinstance(el, (list, tuple)):
+        return False
+    return len(el) == 2 and (_is_container(el[0]) or _is_container(el[1]))
+
+
+def _flatten_support(side, leaves, nested):
+    """Append the nodes of one side (tail or head) of an edge to `leaves`, and the
+    nested edges it contains to `nested`.
+
+    The side is either a single node or a group of elements.  Each element is a
+    node, a nested edge, or a group of nodes and nested edges, which is flattened
+    one level.
+    """
+    # If the side is an iterable of nodes (which is typical), iterate it,
+    # otherwise it is a single node
+    for el in side if _is_container(side) else (side,):
+        # Plain nodes (the common case) skip the helpers altogether
+        if type(el) in _NODE_TYPES:
+            leaves.append(el)
+        elif _is_edge_like(el):
+            nested.append(el)
+        elif _is_container(el):
+            for node in el:
+                # a sub-element may be a nested edge too
+                if type(node) not in _NODE_TYPES and _is_edge_like(node):
+                    nested.append(node)
+                else:
+                    leaves.append(node)
+        else:
+            leaves.append(el)
+
+
+class _FrozenSide(tuple):
+    """The nodes of the tail or head of a frozen edge, sorted when possible.
+
+    Much smaller than a set, while still supporting the `copy` and `union` methods
+    that the views and stats call on edge members.
+
+    """
+
+    __slots__ = ()
+
+    def copy(self):
+        return set(self)
+
+    def union(self, *others):
+        return set(self).union(*others)
+
+
+if FrozenBitMap is not None:
+
+    class _BitMapSide(FrozenBitMap):
+        """The nodes of the tail or head of a large frozen edge, as a bitmap.
+
+        `copy` returns a set, so that the views hand out sets for every edge.
+
+        """
+
+        __slots__ = ()
+
+        def copy(self):
+            return set(self)
+
+
+def _freeze_side(members):
+    try:
+        return _FrozenSide(sorted(members))
+    except TypeError:  # node IDs of mixed types
+        return _FrozenSide(members)
+
+
+def _fits_bitmap(members):
+    """Whether all of `members` are integers that a roaring bitmap can hold."""
+    return all(
+        isinstance(node, (int, np.integer)) and 0 <= node < 2**32 for node in members
+    )
+
+
+def _int_array(values, name):
+    """`values` as an int64 array, without truncating floats as a cast would."""
+    array = np.asarray(values)
+    # an empty list gives a float array
+    if array.size and array.dtype.kind not in "iu":
+        raise ValueError(f"{name} must be integers, not {array.dtype}")
+    return array.astype(np.int64, copy=False)
 
 
 class DiUberGraphs:
@@ -36,6 +150,10 @@ class DiUberGraphs:
         }
 
     def __getattr__(self, attr):
+        # Private names are never stats; this also avoids infinite recursion
+        # through self.nodes before __setstate__ has set the views.
+        if attr.startswith("_"):
+            raise AttributeError(attr)
         stat = getattr(self.nodes, attr, None)
         word = "nodes"
         if stat is None:
@@ -54,6 +172,9 @@ class DiUberGraphs:
         func.__doc__ = f"""Equivalent to DH.{word}.{attr}.asdict(). For accepted *args and
         **kwargs, see documentation of DH.{word}.{attr}."""
 
+        # Cache on the instance so that later lookups of attr find it directly
+        # instead of going through __getattr__ again.
+        self.__dict__[attr] = func
         return func
 
     def __setstate__(self, state):
@@ -69,29 +190,37 @@ class DiUberGraphs:
         -----
         This allows the python multiprocessing module to be used.
         """
+        # Drop any stat wrappers cached by __getattr__, which refer to old views
+        self.__dict__.clear()
         self._edge_uid = state["_edge_uid"]
         self._net_attr = state["_net_attr"]
         self._node = state["_node"]
         self._node_attr = state["_node_attr"]
         self._edge = state["_edge"]
         self._edge_attr = state["_edge_attr"]
+        self._incidence_cache = {}
         self._nodeview = DiNodeView(self)
         self._edgeview = DiEdgeView(self)
 
     def __init__(self, incoming_data=None, **attr):
-        self._edge_uid = count()
+        # The next uid to assign, see _next_uid
+        self._edge_uid = 0
         self._net_attr = self._net_attr_dict_factory()
 
+        # Attribute dicts are only allocated when first looked up, see _AttrDict
         self._node = self._node_dict_factory()
-        self._node_attr = self._node_attr_dict_factory()
+        self._node_attr = _AttrDict(self._node, self._node_attr_dict_factory)
 
         self._edge = self._edge_dict_factory()
-        self._edge_attr = self._edge_attr_dict_factory()
+        self._edge_attr = _AttrDict(self._edge, self._edge_attr_dict_factory)
 
-        # self._nodeview = DiNodeView(self)
+        # Last output of incidence_matrix, cleared on any modification
+        self._incidence_cache = {}
+
+        self._nodeview = DiNodeView(self)
         """A :class:`~xgi.core.views.DiNodeView` of the directed hypergraph."""
 
-        # self._edgeview = DiEdgeView(self)
+        self._edgeview = DiEdgeView(self)
         """An :class:`~xgi.core.views.DiEdgeView` of the directed hypergraph."""
 
         # if incoming_data is not None:
@@ -102,6 +231,22 @@ class DiUberGraphs:
         # to_dihypergraph(incoming_data, create_using=self)
         self._net_attr.update(attr)  # must be after convert
 
+    @property
+    def nodes(self):
+        """A :class:`DiNodeView` of this network."""
+        return self._nodeview
+
+    @property
+    def edges(self):
+        """An :class:`DiEdgeView` of this network."""
+        return self._edgeview
+
+    def _next_uid(self):
+        """Return the next edge uid from the internal counter and advance it."""
+        uid = self._edge_uid
+        self._edge_uid = uid + 1
+        return uid
+
     def add_node(self, node, **attr):
         """Add one node with optional attributes.
 
@@ -122,155 +267,277 @@ class DiUberGraphs:
 
         """
         if node not in self._node:
+            self._node.validate(node)
             self._node[node] = {"in": set(), "out": set()}
-            self._node_attr[node] = self._node_attr_dict_factory()
-        self._node_attr[node].update(attr)
+            self._incidence_cache.clear()
+        if attr:
+            self._node_attr[node].update(attr)
 
     def add_edge(self, members: Iterable, idx=None, **attr):
         """Add one directed hyperedge. Supports nested 'edge-like' elements or
         iterable groups of nodes (flattens one level for node-groups).
+
+        Nested edges are added as separate edges, with uids from the internal
+        counter and without attributes.
         """
         # Validate top-level structure: must be (tail, head)
-        if isinstance(members, (tuple, list)) and len(members) == 2:
-            tail = members[0]
-            head = members[1]
-        else:
+        if not (isinstance(members, (tuple, list)) and len(members) == 2):
             raise TypeError("Directed edge must be a list or tuple of length 2!")
 
-        uid = next(self._edge_uid) if idx is None else idx
+        _node = self._node
+        _edge = self._edge
+        _edge_attr = self._edge_attr
+
+        # Flatten the edge and its nested edges before modifying anything, so that
+        # an invalid node leaves the dihypergraph unchanged.  Nested edges are
+        # handled from a stack rather than by recursive calls.  Each edge pushes its
+        # nested edges in reverse, so that they are still listed depth-first, in the
+        # order they appear, which is the order in which they get uids.
+        edges = []
+        stack = [members]
+        while stack:
+            members = stack.pop()
+            tail, head, nested = [], [], []
+            _flatten_support(members[0], tail, nested)
+            _flatten_support(members[1], head, nested)
+            for node in chain(tail, head):
+                if node not in _node:
+                    _node.validate(node)
+            edges.append((members, tail, head))
+            stack.extend(reversed(nested))
+
+        uid = self._next_uid() if idx is None else idx
 
         # check that uid is not present yet
-        if uid in self._edge:
-            warnings.warn(f"uid {uid} already exists, cannot add edge {members}")
+        if uid in _edge:
+            warnings.warn(f"uid {uid} already exists, cannot add edge {edges[0][0]}")
             return
 
-        self._edge[uid] = {"in": set(), "out": set()}
-
-        def _is_edge_like(el):
-            """Return True if el looks like a nested edge: (tail, head) with length 2
-            and at least one side is an iterable (but not a string/bytes)."""
-            if not isinstance(el, (list, tuple)) or len(el) != 2:
-                return False
-            a, b = el[0], el[1]
-            a_is_iter = isinstance(a, Iterable) and not isinstance(a, (str, bytes))
-            b_is_iter = isinstance(b, Iterable) and not isinstance(b, (str, bytes))
-            return a_is_iter or b_is_iter
-
-        def _process_element(el, is_tail=True):
-            """Process one element from tail/head:
-            - if edge-like -> recurse (add_edge)
-            - elif iterable (but not str/bytes) -> iterate its items and treat them as nodes (flatten one level)
-            - else: treat as single node
-            """
-            if _is_edge_like(el):
-                # nested edge -> recurse
-                self.add_edge(el)
-                return
-
-            # If it's an iterable of nodes (and not a string/bytes), flatten one level
-            if isinstance(el, Iterable) and not isinstance(el, (str, bytes)):
-                for sub in el:
-                    # if a sub-element looks like a nested edge, allow recursion there too
-                    if _is_edge_like(sub):
-                        self.add_edge(sub)
-                        continue
-                    _add_node_to_edge(sub, is_tail)
-                return
-
-            # scalar node
-            _add_node_to_edge(el, is_tail)
-
-        def _add_node_to_edge(node, is_tail):
-            """Add a scalar node to the graph and link it to uid."""
-            if node not in self._node:
-                self._node[node] = {"in": set(), "out": set()}
-                self._node_attr[node] = self._node_attr_dict_factory()
-            if is_tail:
-                self._node[node]["out"].add(uid)
-                self._edge[uid]["in"].add(node)
-            else:
-                self._node[node]["in"].add(uid)
-                self._edge[uid]["out"].add(node)
-
-        # Process tail elements
-        # If tail itself is an iterable of nodes (which is typical), iterate it
-        if isinstance(tail, Iterable) and not isinstance(tail, (str, bytes)):
-            for el in tail:
-                _process_element(el, is_tail=True)
-        else:
-            _process_element(tail, is_tail=True)
-
-        # Process head elements
-        if isinstance(head, Iterable) and not isinstance(head, (str, bytes)):
-            for el in head:
-                _process_element(el, is_tail=False)
-        else:
-            _process_element(head, is_tail=False)
-
         # Set attributes for this edge
-        self._edge_attr[uid] = self._edge_attr_dict_factory()
-        self._edge_attr[uid].update(attr)
+        if attr:
+            _edge_attr[uid] = self._edge_attr_dict_factory(attr)
 
         # If user provided idx, make sure internal uid counter stays consistent
+        # before nested edges draw from it
         if idx is not None:
             update_uid_counter(self, idx)
 
-            if isinstance(members, (tuple, list)) and len(members) == 2:
-                tail = members[0]
-                head = members[1]
-            else:
-                raise TypeError("Directed edge must be a list or tuple of length 2!")
-
-            uid = next(self._edge_uid) if idx is None else idx
-
-            # check that uid is not present yet
-            if uid in self._edge:
-                warnings.warn(f"uid {uid} already exists, cannot add edge {members}")
-                return
-
-            self._edge[uid] = {"in": set(), "out": set()}
-
-            # helper that decides when an element is a nested edge vs a node
-            def _is_edge_like(el):
-                # edge-like = list/tuple of length 2 where at least one side is itself iterable
-                return (
-                    isinstance(el, (list, tuple))
-                    and len(el) == 2
-                    and (isinstance(el[0], Iterable) or isinstance(el[1], Iterable))
-                )
-
-            # process tail elements
-            for element in tail:
-                if _is_edge_like(element):
-                    # element looks like a nested edge: treat it as an (tail, head) and add it
-                    self.add_edge(element)
+        self._incidence_cache.clear()
+
+        for i, (members, tail, head) in enumerate(edges):
+            if i:
+                uid = self._next_uid()
+                if uid in _edge:
+                    warnings.warn(
+                        f"uid {uid} already exists, cannot add edge {members}"
+                    )
                     continue
 
-                node = element
+            _edge[uid] = {"in": set(tail), "out": set(head)}
 
-                if node not in self._node:
-                    self._node[node] = {"in": set(), "out": set()}
-                    self._node_attr[node] = self._node_attr_dict_factory()
+            # Tail nodes are sent from ("out"), head nodes are received at ("in")
+            for nodes, membership in ((tail, "out"), (head, "in")):
+                for node in nodes:
+                    memberships = _node.get(node)
+                    if memberships is None:
+                        memberships = _node[node] = {"in": set(), "out": set()}
+                    memberships[membership].add(uid)
 
-                self._node[node]["out"].add(uid)
-                self._edge[uid]["in"].add(node)
+    def add_edges_from_arrays(
+        self, tail_offsets, tail_nodes, head_offsets, head_nodes, uids=None
+    ):
+        """Add many directed hyperedges given as CSR-style integer arrays.
 
-            # process head elements
-            for element in head:
-                if _is_edge_like(element):
-                    self.add_edge(element)
-                    continue
+        The tail of the i-th edge is
+        ``tail_nodes[tail_offsets[i]:tail_offsets[i + 1]]`` and its head is
+        ``head_nodes[head_offsets[i]:head_offsets[i + 1]]``.
 
-                node = element
-                if node not in self._node:
-                    self._node[node] = {"in": set(), "out": set()}
-                    self._node_attr[node] = self._node_attr_dict_factory()
+        Parameters
+        ----------
+        tail_offsets, head_offsets : array-like of int
+            Offsets of each edge's tail and head, of length (number of edges + 1),
+            starting at 0 and ending at the length of the corresponding node array.
+        tail_nodes, head_nodes : array-like of int
+            Concatenated node IDs of the tails and heads.  Map hashable nodes to
+            integers beforehand, e.g. with a dict.
+        uids : iterable, optional
+            Edge IDs, one per edge.  By default, IDs are taken from the internal
+            uid counter, as in `add_edge`.
+
+        Raises
+        ------
+        ValueError
+            If the offsets or nodes are not integers, if the offsets are
+            inconsistent with the node arrays or with each other, or if an edge ID
+            is invalid, repeated or already exists.
 
-                self._node[node]["in"].add(uid)
-                self._edge[uid]["out"].add(node)
+        See Also
+        --------
+        add_edge
+
+        Notes
+        -----
+        Nested edges are not supported.  The node memberships are computed by
+        sorting the incidences with NumPy rather than one Python-level dict and
+        set update per incidence, which makes this faster than calling `add_edge`
+        for large numbers of edges.
 
-            self._edge_attr[uid] = self._edge_attr_dict_factory()
-            self._edge_attr[uid].update(attr)
+        """
+        tail_offsets = _int_array(tail_offsets, "tail_offsets")
+        head_offsets = _int_array(head_offsets, "head_offsets")
+        tail_nodes = _int_array(tail_nodes, "tail_nodes")
+        head_nodes = _int_array(head_nodes, "head_nodes")
+
+        num_edges = len(tail_offsets) - 1
+        if len(head_offsets) - 1 != num_edges:
+            raise ValueError("tail_offsets and head_offsets must have the same length")
+        for offsets, nodes in ((tail_offsets, tail_nodes), (head_offsets, head_nodes)):
+            if (
+                num_edges < 0
+                or offsets[0] != 0
+                or offsets[-1] != len(nodes)
+                or np.any(np.diff(offsets) < 0)
+            ):
+                raise ValueError("Offsets must increase from 0 to the number of nodes")
+
+        if uids is None:
+            uids = list(range(self._edge_uid, self._edge_uid + num_edges))
+            self._edge_uid += num_edges
+        else:
+            uids = list(uids)
+            if len(uids) != num_edges:
+                raise ValueError("There must be one uid per edge")
+            # Check all the uids before moving the counter, so that an invalid
+            # one leaves the dihypergraph unchanged
+            for uid in uids:
+                try:
+                    self._edge.validate(uid)
+                except (XGIError, TypeError) as e:
+                    raise ValueError(f"Invalid uid {uid!r}") from e
+            if len(set(uids)) != num_edges or any(uid in self._edge for uid in uids):
+                raise ValueError("uids must be unique and not already in use")
+            integer_uids = [uid for uid in uids if _is_integer_id(uid)]
+            if integer_uids:
+                update_uid_counter(self, max(integer_uids))
+
+        self._incidence_cache.clear()
+
+        _node = self._node
+        _edge = self._edge
+
+        tail_list = tail_nodes.tolist()
+        head_list = head_nodes.tolist()
+        tail_bounds = tail_offsets.tolist()
+        head_bounds = head_offsets.tolist()
+        for i, uid in enumerate(uids):
+            _edge[uid] = {
+                "in": set(tail_list[tail_bounds[i] : tail_bounds[i + 1]]),
+                "out": set(head_list[head_bounds[i] : head_bounds[i + 1]]),
+            }
+
+        # Group the incidences by node: tail nodes send ("out"), head nodes
+        # receive ("in").  Sorting by node makes each node's edges a contiguous
+        # slice of one Python list, so no per-node array is created.
+        for offsets, nodes, membership in (
+            (tail_offsets, tail_nodes, "out"),
+            (head_offsets, head_nodes, "in"),
+        ):
+            if not len(nodes):
+                continue
+            order = np.argsort(nodes, kind="stable")
+            sorted_nodes = nodes[order]
+            starts = np.flatnonzero(sorted_nodes[1:] != sorted_nodes[:-1]) + 1
+            bounds = [0, *starts.tolist(), len(nodes)]
+            edge_idx = np.repeat(np.arange(num_edges), np.diff(offsets))[order]
+            sorted_uids = [uids[j] for j in edge_idx.tolist()]
+            for node, start, stop in zip(
+                sorted_nodes[bounds[:-1]].tolist(), bounds, bounds[1:]
+            ):
+                memberships = _node.get(node)
+                if memberships is None:
+                    memberships = _node[node] = {"in": set(), "out": set()}
+                memberships[membership].update(sorted_uids[start:stop])
+
+    def freeze(self, bitmap_threshold=64):
+        """Store the tail and head of every edge as a tuple instead of a set.
+
+        A set costs about 216 bytes even when empty, which dominates the memory of
+        a dihypergraph with many small edges.  Frozen edges are also faster to
+        iterate, e.g., in `incidence_matrix`.
 
-            if idx is not None:  # set self._edge_uid correctly if user provided idx
-                update_uid_counter(self, idx)
+        Parameters
+        ----------
+        bitmap_threshold : int, default: 64
+            If pyroaring is installed, edges with a tail or head larger than this
+            are stored as two `pyroaring.FrozenBitMap` instead, provided their nodes
+            are integers in [0, 2**32).  These are several times smaller than
+            tuples of Python ints, and support fast intersections and counts, see
+            `incidence_bitmap`.
+
+        Notes
+        -----
+        Edges are never modified once added, so this can be called at any time,
+        typically once the dihypergraph is built.  Edges added afterwards use sets
+        until the next call.
+
+        """
+        for members in self._edge.values():
+            tail, head = members["in"], members["out"]
+            if not isinstance(tail, set):
+                continue  # already frozen
+            if (
+                FrozenBitMap is not None
+                and max(len(tail), len(head)) > bitmap_threshold
+                and _fits_bitmap(tail)
+                and _fits_bitmap(head)
+            ):
+                # both sides, so that tail.union(head) works
+                members["in"] = _BitMapSide(tail)
+                members["out"] = _BitMapSide(head)
+            else:
+                members["in"] = _freeze_side(tail)
+                members["out"] = _freeze_side(head)
+
+    def incidence_bitmap(self, edge, side):
+        """Get the tail or head of an edge as a roaring bitmap.
+
+        Parameters
+        ----------
+        edge : hashable
+            Edge ID.
+        side : {"in", "out"}
+            "in" for the tail of the edge, "out" for its head.
+
+        Returns
+        -------
+        pyroaring.FrozenBitMap or pyroaring.BitMap
+            A copy of the bitmap stored by `freeze` if there is one, otherwise a
+            new bitmap of the members.
+
+        Raises
+        ------
+        ImportError
+            If pyroaring is not installed.
+        IDNotFound
+            If `edge` is not in the dihypergraph.
+        ValueError
+            If `side` is not "in" or "out", or if the nodes of that side are not
+            all integers in [0, 2**32).
+
+        """
+        if BitMap is None:
+            raise ImportError("incidence_bitmap requires pyroaring")
+        if edge not in self._edge:
+            raise IDNotFound(f"ID {edge} not found")
+        if side not in ("in", "out"):
+            raise ValueError(f'side must be "in" or "out", not {side!r}')
+        members = self._edge[edge][side]
+        if isinstance(members, FrozenBitMap):
+            # a plain FrozenBitMap, as the stored _BitMapSide copies to a set
+            return FrozenBitMap(members)
+        if not _fits_bitmap(members):
+            raise ValueError(
+                f"The nodes of edge {edge} must be integers in [0, 2**32) to be "
+                "stored in a bitmap"
+            )
+        return BitMap(members)
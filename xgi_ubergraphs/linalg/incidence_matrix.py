@@ -1,15 +1,120 @@
+from functools import cache
+from itertools import chain
+
 import numpy as np
-from scipy.sparse import csr_array
+from scipy.sparse import csc_array, csr_array
+from xgi.exception import XGIError
+
+# Default weight.  Recognized by `_is_unit_weight` so the common unweighted case can
+# skip calling it once per incidence.
+_ONE = lambda node, edge, H: 1
+
+
+def _is_unit_weight(weight):
+    """Whether `weight` is `_ONE` or a lambda with the same constant body."""
+    if weight is _ONE:
+        return True
+    code = getattr(weight, "__code__", None)
+    return (
+        code is not None
+        and code.co_argcount == _ONE.__code__.co_argcount
+        and code.co_code == _ONE.__code__.co_code
+        and code.co_consts == _ONE.__code__.co_consts
+    )
+
+
+# Compiled weights keyed by their code object, or None if numba could not compile
+# it.  At most _JIT_WEIGHTS_MAX are kept, oldest first out.
+_JIT_WEIGHTS = {}
+_JIT_WEIGHTS_MAX = 32
+
+# Fewest incidences for which compiling a weight pays off over calling it from Python
+_JIT_MIN_NNZ = 100_000
+
+
+@cache
+def _load_numba():
+    """Import numba and define the compiled weight loop, on first use only.
+
+    numba is optional and slow to import, and only needed for large weighted
+    matrices, see `_jit_weight`.
+
+    Returns
+    -------
+    tuple or None
+        The numba module and the loop filling an array with the weights, or None
+        if numba is not installed.
+
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+
+    @numba.njit
+    def fill_weights(weight, nodes, edges, data):
+        for i in range(data.shape[0]):
+            data[i] = weight(nodes[i], edges[i], None)
+
+    return numba, fill_weights
+
+
+def _jit_weight(weight, node, edge):
+    """Compile `weight` with numba for integer node and edge IDs.
+
+    The weight is compiled with H set to None, so only weights that do not use the
+    hypergraph qualify.  The result is cached under ``weight.__code__``, so that
+    equal lambdas passed to different calls share one compilation; weights with a
+    closure, default arguments or global names are never compiled, as numba would
+    freeze their current values into the cached code.
+
+    Returns
+    -------
+    numba dispatcher or None
+        None if numba is not installed or cannot compile `weight`.
+
+    """
+    code = getattr(weight, "__code__", None)
+    if (
+        code is None
+        or weight.__closure__ is not None
+        or weight.__defaults__ is not None
+        or code.co_names
+    ):
+        return None
+    if code not in _JIT_WEIGHTS:
+        loaded = _load_numba()
+        if loaded is None:
+            return None
+        try:
+            jitted = loaded[0].njit(weight)
+            jitted(node, edge, None)  # probe: compiles, or fails typing
+        except Exception:
+            jitted = None
+        if len(_JIT_WEIGHTS) >= _JIT_WEIGHTS_MAX:
+            del _JIT_WEIGHTS[next(iter(_JIT_WEIGHTS))]
+        _JIT_WEIGHTS[code] = jitted
+    return _JIT_WEIGHTS[code]
+
+
+def _as_int_array(ids):
+    """`ids` as a 1-D integer array, or None if they are not all integers."""
+    try:
+        array = np.asarray(ids)
+    except ValueError:  # e.g., tuples of different lengths
+        return None
+    return array if array.ndim == 1 and array.dtype.kind in "iu" else None
+
 
 def incidence_matrix(
-    H, order=None, sparse=True, index=False, weight=lambda node, edge, H: 1
+    H, order=None, sparse=True, index=False, weight=_ONE, signed=False, dtype=int
 ):
     """A function to generate a weighted incidence matrix from a Hypergraph object,
     where the rows correspond to nodes and the columns correspond to edges.
 
     Parameters
     ----------
-    H: Hypergraph object
+    H: Hypergraph or DiUberGraphs object
         The hypergraph of interest
     order: int, optional
         Order of interactions to use. If None (default), all orders are used. If int,
@@ -20,56 +125,177 @@ def incidence_matrix(
         Specifies whether to output dictionaries mapping the node and edge IDs to
         indices.
     weight: lambda function, default=lambda function outputting 1
-        A function specifying the weight, given a node and edge
+        A function specifying the weight, given a node and edge. If numba is
+        installed, node and edge IDs are integers, there are at least
+        `_JIT_MIN_NNZ` incidences, and the function only uses its node and edge
+        arguments, it is compiled once and reused across calls. A compiled weight
+        computes with fixed-width integers and casts its results to `dtype`
+        without any check, so a weight whose values do not fit in int64 or in
+        `dtype` gives wrapped-around entries for large hypergraphs, where the
+        same weight raises OverflowError for small ones.
+    signed: bool, default: False
+        Only for directed hypergraphs. If True, output separate incidence matrices
+        for the tails and the heads of the edges. If False (default), a node is
+        incident to an edge if it is in its tail or its head.
+    dtype: numpy dtype, default: int
+        The dtype of the entries. A narrower integer dtype such as `numpy.int8`
+        saves memory, but the weights must fit in it and products of the matrix
+        may overflow it.
 
     Returns
     -------
-    I: numpy.ndarray or scipy csr_array
-        The incidence matrix, has dimension (n_nodes, n_edges)
+    I: numpy.ndarray or scipy csr_array, or a tuple of two of them
+        The incidence matrix, has dimension (n_nodes, n_edges). If signed is True,
+        the tuple (I_in, I_out) of the tail and head incidence matrices.
     rowdict: dict
         The dictionary mapping indices to node IDs, if index is True
     coldict: dict
         The dictionary mapping indices to edge IDs, if index is True
 
+    Notes
+    -----
+    Hypergraphs with an `_incidence_cache` dict, such as DiUberGraphs, keep the
+    last unweighted result until nodes or edges are next added with their `add_*`
+    methods, and return a copy of it when called again with the same arguments.
+    Results with a custom weight are never cached.  Modifying the internal dicts
+    such as `H._edge` directly does not clear the cache.
+
+    Raises
+    ------
+    XGIError
+        If signed is True and the hypergraph is not directed.
+
     """
-    node_ids = H.nodes
-    edge_ids = H.edges
+    result_cache = getattr(H, "_incidence_cache", None)
+    # Only the structure is cached: a custom weight may read node attributes or
+    # other state that changes without the hypergraph knowing.
+    if result_cache is None or not _is_unit_weight(weight):
+        return _incidence_matrix(H, order, sparse, index, weight, signed, dtype)
+
+    key = (order, sparse, index, signed, np.dtype(dtype))
+    result = result_cache.get(key)
+    if result is None:
+        result = _incidence_matrix(H, order, sparse, index, weight, signed, dtype)
+        # Only keep the last result, as most code asks for one kind of matrix
+        result_cache.clear()
+        result_cache[key] = result
+    # The cached matrices must not be modified by the caller
+    return _copy_result(result, index)
 
+
+def _copy_result(result, index):
+    """Copy the matrices and dicts output by `incidence_matrix`."""
+    if index:
+        I, rowdict, coldict = result
+        return _copy_result(I, False), dict(rowdict), dict(coldict)
+    if isinstance(result, tuple):
+        return tuple(I.copy() for I in result)
+    return result.copy()
+
+
+def _incidence_matrix(H, order, sparse, index, weight, signed, dtype):
+    """Compute the output of `incidence_matrix`, without caching."""
+    unit_weight = _is_unit_weight(weight)
+
+    # Materialize the views once; each len() or pass over a view walks the
+    # underlying dict again.
+    node_ids = tuple(H.nodes)
     if order is not None:
-        edge_ids = H.edges.filterby("order", order)
+        edge_ids = tuple(H.edges.filterby("order", order))
+    else:
+        edge_ids = tuple(H.edges)
     if not edge_ids or not node_ids:
         if sparse:
-            Identity_Matrix = csr_array((0, 0), dtype=int)
+            Identity_Matrix = csr_array((0, 0), dtype=dtype)
         else:
-            Identity_Matrix = np.empty((0, 0), dtype=int)
+            Identity_Matrix = np.empty((0, 0), dtype=dtype)
+        if signed:
+            Identity_Matrix = (Identity_Matrix, Identity_Matrix.copy())
         return (Identity_Matrix, {}, {}) if index else Identity_Matrix
 
     num_edges = len(edge_ids)
     num_nodes = len(node_ids)
 
-    node_dict = dict(zip(node_ids, range(num_nodes)))
-    edge_dict = dict(zip(edge_ids, range(num_edges)))
+    # Edges are indexed by their position, so only nodes need a lookup table
+    node_dict = {node: i for i, node in enumerate(node_ids)}
 
     if index:
-        rowdict = {v: k for k, v in node_dict.items()}
-        coldict = {v: k for k, v in edge_dict.items()}
-
-    # Compute the non-zero values, row and column indices for the given order
-    rows = []
-    cols = []
-    data = []
-    for edge in edge_ids:
-        members = H._edge[edge]
-        for node in members:
-            rows.append(node_dict[node])
-            cols.append(edge_dict[edge])
-            data.append(weight(node, edge, H))
-
-    # Create the incidence matrix as a CSR matrix
-    if sparse:
-        Identity_Matrix = csr_array((data, (rows, cols)), shape=(num_nodes, num_edges), dtype=int)
+        rowdict = dict(enumerate(node_ids))
+        coldict = dict(enumerate(edge_ids))
+
+    # Directed edges are stored as {"in": tail, "out": head}
+    members = [H._edge[edge] for edge in edge_ids]
+    directed = isinstance(members[0], dict)
+    if signed and not directed:
+        raise XGIError("A signed incidence matrix requires a directed hypergraph")
+
+    def _assemble(members):
+        # Compute the non-zero values and row indices for the given order, edge by
+        # edge: the members of the j-th edge fill rows[ptr[j]:ptr[j + 1]], mapped
+        # through node_dict in a single pass.  All arrays are preallocated to the
+        # total number of incidences, and are already in compressed column form.
+        lens = np.fromiter(map(len, members), dtype=np.int64, count=num_edges)
+        ptr = np.zeros(num_edges + 1, dtype=np.int64)
+        np.cumsum(lens, out=ptr[1:])
+        nnz = int(ptr[-1])
+
+        rows = np.fromiter(
+            map(node_dict.__getitem__, chain.from_iterable(members)),
+            dtype=np.int64,
+            count=nnz,
+        )
+        # With integer IDs, a weight that numba can compile is evaluated in a
+        # compiled loop instead of one Python call per incidence, once there are
+        # enough incidences to make up for the compilation.
+        jitted = None
+        if not unit_weight and nnz >= _JIT_MIN_NNZ:
+            node_array = _as_int_array(node_ids)
+            edge_array = _as_int_array(edge_ids)
+            if node_array is not None and edge_array is not None:
+                jitted = _jit_weight(weight, node_array[0], edge_array[0])
+        data = None
+        if unit_weight:
+            data = np.ones(nnz, dtype=dtype)
+        elif jitted is not None:
+            data = np.empty(nnz, dtype=dtype)
+            fill_weights = _load_numba()[1]
+            try:
+                fill_weights(
+                    jitted, node_array[rows], np.repeat(edge_array, lens), data
+                )
+            except Exception:
+                # e.g., a dtype that numba does not support, such as float16 or
+                # object; the Python loop below handles it, or raises the error
+                data = None
+        if data is None:
+            data = np.fromiter(
+                (
+                    weight(node, edge, H)
+                    for edge, edge_members in zip(edge_ids, members)
+                    for node in edge_members
+                ),
+                dtype=dtype,
+                count=nnz,
+            )
+
+        # Create the incidence matrix as a CSR matrix
+        if sparse:
+            return csc_array(
+                (data, rows, ptr), shape=(num_nodes, num_edges), dtype=data.dtype
+            ).tocsr()
+        I = np.zeros((num_nodes, num_edges), dtype=data.dtype)
+        cols = np.repeat(np.arange(num_edges, dtype=np.int64), lens)
+        I[rows, cols] = data
+        return I
+
+    if signed:
+        Identity_Matrix = (
+            _assemble([m["in"] for m in members]),
+            _assemble([m["out"] for m in members]),
+        )
     else:
-        Identity_Matrix = np.zeros((num_nodes, num_edges), dtype=int)
-        Identity_Matrix[rows, cols] = data
+        if directed:
+            members = [set(m["in"]).union(m["out"]) for m in members]
+        Identity_Matrix = _assemble(members)
 
-    return (Identity_Matrix, rowdict, coldict) if index else Identity_Matrix
\ No newline at end of file
+    return (Identity_Matrix, rowdict, coldict) if index else Identity_Matrix
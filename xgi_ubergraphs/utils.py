@@ -1,10 +1,13 @@
 """General utilities."""
 
+import os
 import random
 from collections import defaultdict
 from copy import deepcopy
 from functools import cache
-from itertools import chain, combinations, count
+from itertools import chain, combinations
+
+from xgi.exception import IDNotFound, XGIError
 
 __all__ = [
     "IDDict",
@@ -12,71 +15,127 @@ __all__ = [
 ]
 
 
+_STRICT_IDS = os.environ.get("XGI_UBERGRAPHS_STRICT_IDS", "0") not in ("", "0")
+"""Whether IDDict validates every access.
+
+When False (default), lookups go straight to the C-level dict slots; new nodes are
+still validated by the `add_*` methods.  When True, setting None as an ID raises
+XGIError and missing IDs raise IDNotFound instead of KeyError.  Set from the
+XGI_UBERGRAPHS_STRICT_IDS environment variable when this module is first imported;
+changing it afterwards has no effect.
+"""
+
+
 class IDDict(dict):
     """A dict that holds (node or edge) IDs.
 
     For internal use only.  Adds input validation functionality to the internal dicts
-    that hold nodes and edges in a network.
+    that hold nodes and edges in a network.  The item accessors are only overridden
+    when `_STRICT_IDS` is True; otherwise use `validate` to check an ID explicitly.
 
     """
 
-    def __getitem__(self, item):
-        try:
-            return dict.__getitem__(self, item)
-        except KeyError as e:
-            raise IDNotFound(f"ID {item} not found") from e
+    if _STRICT_IDS:
+
+        def __getitem__(self, item):
+            try:
+                return dict.__getitem__(self, item)
+            except KeyError as e:
+                raise IDNotFound(f"ID {item} not found") from e
+
+        def __setitem__(self, item, value):
+            self.validate(item)
+            return dict.__setitem__(self, item, value)
+
+        def __delitem__(self, item):
+            try:
+                return dict.__delitem__(self, item)
+            except KeyError as e:
+                raise IDNotFound(f"ID {item} not found") from e
+
+    def validate(self, item):
+        """Check that `item` can be used as an ID.
+
+        Raises
+        ------
+        XGIError
+            If `item` is None.
+        TypeError
+            If `item` is not hashable.
 
-    def __setitem__(self, item, value):
+        """
         if item is None:
             raise XGIError("None cannot be a node or edge")
         try:
-            return dict.__setitem__(self, item, value)
+            hash(item)
         except TypeError as e:
             raise TypeError(f"ID {item} not a valid type") from e
 
-    def __delitem__(self, item):
-        try:
-            return dict.__delitem__(self, item)
-        except KeyError as e:
-            raise IDNotFound(f"ID {item} not found") from e
-
     def __add__(self, dict):
         d = dict.copy()
         d.update(self)
         return d
 
 
+class _AttrDict(IDDict):
+    """The attribute dicts of nodes or edges, keyed by their IDs.
+
+    For internal use only.  Most nodes and edges never get attributes, so their
+    attribute dict is only allocated, with `factory`, the first time it is looked
+    up.  Looking up an ID that is not in `ids`, the dict of nodes or edges, raises
+    KeyError as usual.
+
+    """
+
+    def __init__(self, ids, factory):
+        super().__init__()
+        self._ids = ids
+        self._factory = factory
+
+    def __missing__(self, item):
+        if item not in self._ids:
+            raise KeyError(item)
+        attrs = self[item] = self._factory()
+        return attrs
+
+
+def _is_integer_id(idx):
+    """Whether `idx` is an integer-like ID, which the uid counter could yield.
+
+    We use the somewhat convoluted float(idx).is_integer() instead of using
+    isinstance(idx, int) because there exist integer-like numeric types (such as
+    np.int32) which fail the isinstance() check.  Tuples come from merging edges
+    and, like strings and other non-numeric IDs, are never integers.
+
+    """
+    if isinstance(idx, (str, tuple)):
+        return False
+    try:
+        return float(idx).is_integer()
+    except (TypeError, ValueError):
+        return False
+    except OverflowError:  # an int too large for a float
+        return True
+
+
 def update_uid_counter(H, idx):
     """
     Helper function to make sure the uid counter is set correctly after
     adding an edge with a user-provided ID.
 
-    If we don't set the start of self._edge_uid correctly, it will start at 0,
-    which will overwrite any existing edges when calling add_edge().  First, we
-    use the somewhat convoluted float(e).is_integer() instead of using
-    isinstance(e, int) because there exist integer-like numeric types (such as
-    np.int32) which fail the isinstance() check.
+    H._edge_uid holds the next uid as a plain int.  If we don't move it past idx,
+    it will eventually reach idx, which will overwrite any existing edges when
+    calling add_edge().  Only integer-like IDs matter, see `_is_integer_id`.
 
     Parameters
     ----------
-    H : xgi.Hypergraph
+    H : DiUberGraphs
         Hypergraph of which to update the uid counter
     idx : any hashable type
         User-provided ID.
 
     """
-    uid = next(H._edge_uid)
-    if (
-        not isinstance(idx, str)
-        and not isinstance(idx, tuple)
-        and float(idx).is_integer()
-        and uid <= idx
-    ):
-        # tuple comes from merging edges and doesn't have as as_integer() method.
-        start = int(idx) + 1
-        # we set the start at one plus the maximum edge ID that is an integer,
-        # because count() only yields integer IDs.
-    else:
-        start = uid
-    H._edge_uid = count(start=start)
-
+    if _is_integer_id(idx) and idx >= H._edge_uid:
+        # we set the counter to one plus the maximum edge ID that is an integer,
+        # because the counter only yields integer IDs.
+        H._edge_uid = int(idx) + 1